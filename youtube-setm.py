@@ -1,928 +1,1795 @@
-# youtube-setm.py
-
-import os
-import sys
-import subprocess
-import json
-import re
-import sqlite3
-from datetime import datetime
-
-import requests
-import yt_dlp
-from PyQt5.QtCore import QThread, pyqtSignal, Qt, QSettings
-from PyQt5.QtGui import QFont, QIcon, QPixmap, QImage
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-                             QLabel, QLineEdit, QPushButton, QProgressBar, QFileDialog,
-                             QMessageBox, QGroupBox, QTextEdit, QComboBox, QFrame,
-                             QTabWidget, QScrollArea)
-
-# --- Helper Functions ---
-
-def get_video_duration(video_path):
-    """Gets video duration using ffprobe."""
-    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "json", video_path]
-    try:
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True, encoding='utf-8')
-        info = json.loads(result.stdout)
-        return float(info["format"]["duration"])
-    except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error getting video duration: {e}")
-        return 0
-
-def get_video_bitrate(video_path):
-    """Gets video bitrate using ffprobe, with a fallback to format bitrate."""
-    cmd_stream = [
-        "ffprobe", "-v", "error", "-select_streams", "v:0",
-        "-show_entries", "stream=bit_rate", "-of", "default=noprint_wrappers=1:nokey=1", video_path
-    ]
-    try:
-        result = subprocess.run(cmd_stream, capture_output=True, text=True, check=True, encoding='utf-8')
-        bitrate = result.stdout.strip()
-        if bitrate and bitrate.isdigit() and int(bitrate) > 0:
-            return bitrate
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        pass
-
-    cmd_format = [
-        "ffprobe", "-v", "error", "-show_entries", "format=bit_rate",
-        "-of", "default=noprint_wrappers=1:nokey=1", video_path
-    ]
-    try:
-        result = subprocess.run(cmd_format, capture_output=True, text=True, check=True, encoding='utf-8')
-        bitrate = result.stdout.strip()
-        if bitrate and bitrate.isdigit() and int(bitrate) > 0:
-            return bitrate
-    except (subprocess.CalledProcessError, FileNotFoundError) as e:
-        print(f"Could not determine bitrate: {e}")
-    
-    return None
-
-def translate_text_deepseek(text_list, api_key):
-    """
-    Translates a list of texts using the DeepSeek API with a strict JSON format.
-
-    Args:
-        text_list (list): A list of strings to be translated.
-        api_key (str): The DeepSeek API key.
-
-    Returns:
-        list: A list of translated strings.
-
-    Raises:
-        ValueError: If the translation response is invalid, mismatched, or contains an API error.
-    """
-    url = "https://api.deepseek.com/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-    
-    # A stricter, more explicit prompt demanding a specific JSON structure.
-    system_prompt = """
-    You are an expert subtitle translator. You will receive a JSON array of strings.
-    Translate each string from Japanese or English into natural, fluent Simplified Chinese.
-    Your response MUST be a single JSON object with a single key named "translations", which contains the JSON array of the translated strings.
-    Do not add any extra content, explanations, or markdown.
-
-    Example Input: ["Hello", "How are you?"]
-    Example Output: {"translations": ["你好", "你怎么样？"]}
-    """
-    
-    user_content = json.dumps(text_list, ensure_ascii=False)
-
-    data = {
-        "model": "deepseek-chat",
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_content} 
-        ],
-        "temperature": 0.25,
-        "top_p": 0.85,
-        "response_format": {"type": "json_object"}
-    }
-    
-    try:
-        response = requests.post(url, headers=headers, json=data, timeout=90)
-        response.raise_for_status()
-        
-        response_text = response.json()["choices"][0]["message"]["content"]
-        parsed_json = json.loads(response_text)
-        
-        if not isinstance(parsed_json, dict):
-            raise ValueError(f"API did not return a JSON object. Response: {response_text}")
-
-        if 'error' in parsed_json:
-            raise ValueError(f"API returned an error: {parsed_json.get('error')}")
-
-        translated_list = parsed_json['translations']
-
-        if not isinstance(translated_list, list):
-            raise ValueError("The 'translations' key did not contain a list.")
-
-        if len(translated_list) != len(text_list):
-            raise ValueError(f"Translation mismatch: Expected {len(text_list)}, got {len(translated_list)}.")
-        
-        return translated_list
-        
-    except (KeyError, TypeError):
-        raise ValueError(f"API response did not contain 'translations' key. Response: {response_text}")
-    except Exception as e:
-        raise ValueError(f"An unexpected error occurred: {e}")
-
-def translate_srt_file(input_srt, output_srt, api_key, log_signal):
-    """
-    Parses an SRT file, groups entries into batches, translates them using a
-    hybrid batch/fallback method, and writes the translated SRT file.
-    """
-    with open(input_srt, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    # Use regex to robustly parse SRT file into index, timestamp, and text blocks
-    srt_pattern = re.compile(r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3})\n([\s\S]*?)(?=\n\n|\Z)', re.MULTILINE)
-    srt_blocks = srt_pattern.findall(content)
-
-    # Extract just the text parts for translation
-    original_texts = [block[2].replace('\n', ' ').strip() for block in srt_blocks]
-    translated_texts = []
-    
-    # Process in batches of 20 to balance speed and API limitations
-    batch_size = 20
-    for i in range(0, len(original_texts), batch_size):
-        batch_originals = original_texts[i:i+batch_size]
-        batch_num = (i // batch_size) + 1
-
-        try:
-            log_signal.emit(f"[INFO] Translating batch {batch_num} ({len(batch_originals)} entries) via JSON batch mode...")
-            
-            # --- Primary Method: Attempt batch translation ---
-            batch_translated = translate_text_deepseek(batch_originals, api_key)
-            translated_texts.extend(batch_translated)
-            log_signal.emit(f"[INFO] Batch {batch_num} translated successfully.")
-
-        except ValueError as e:
-            # --- Fallback Method: Translate one-by-one if batch fails ---
-            log_signal.emit(f"[WARN] Batch {batch_num} failed: {e}. Falling back to single-line translation for this batch.")
-            
-            fallback_translated_batch = []
-            for j, single_text in enumerate(batch_originals):
-                try:
-                    log_signal.emit(f"[INFO] Fallback: Translating line {i+j+1}...")
-                    
-                    # Call the same function, but with a list containing only one item
-                    single_translation_list = translate_text_deepseek([single_text], api_key)
-                    fallback_translated_batch.append(single_translation_list[0])
-
-                except Exception as single_e:
-                    log_signal.emit(f"[ERROR] Line {i+j+1} failed to translate: {single_e}. Using original text.")
-                    fallback_translated_batch.append(single_text) # Use original on single failure
-            
-            translated_texts.extend(fallback_translated_batch)
-
-    # Write the new SRT file using the original timestamps and new translated text
-    with open(output_srt, "w", encoding="utf-8") as f:
-        for i, block in enumerate(srt_blocks):
-            if i < len(translated_texts):
-                f.write(f"{block[0]}\n")      # Index
-                f.write(f"{block[1]}\n")      # Timestamp
-                f.write(f"{translated_texts[i]}\n\n") # Translated text
-
-def clean_youtube_url(url):
-    """Clean a YouTube URL to its most basic form."""
-    patterns = [
-        r'(https?://(?:www\.|m\.|music\.)?youtube\.com/watch\?v=[a-zA-Z0-9_-]+)',
-        r'(https?://youtu\.be/[a-zA-Z0-9_-]+)'
-    ]
-    for pattern in patterns:
-        match = re.match(pattern, url)
-        if match:
-            return match.group(1)
-    return url
-
-def open_containing_folder(path):
-    """Opens the folder containing the specified file."""
-    if not os.path.exists(path):
-        # If the path points to a file that doesn't exist, use its directory
-        folder = os.path.dirname(path)
-    elif os.path.isdir(path):
-        folder = path
-    else:
-        folder = os.path.dirname(path)
-
-    if not os.path.isdir(folder):
-        print(f"Error: Folder does not exist at {folder}")
-        return
-
-    if sys.platform == 'win32':
-        os.startfile(folder)
-    elif sys.platform == 'darwin':
-        subprocess.Popen(['open', folder])
-    else:
-        subprocess.Popen(['xdg-open', folder])
-
-
-# --- Database Manager ---
-class DatabaseManager:
-    """Manages the SQLite database for processing history."""
-    def __init__(self, db_path="processing_history.db"):
-        self.db_path = db_path
-        self.init_database()
-
-    def init_database(self):
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS history (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        title TEXT NOT NULL,
-                        url TEXT NOT NULL,
-                        process_type TEXT,
-                        quality TEXT,
-                        final_path TEXT,
-                        process_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        status TEXT
-                    )
-                ''')
-                conn.commit()
-        except Exception as e:
-            print(f"Database initialization error: {e}")
-
-    def save_record(self, title, url, process_type, quality, final_path, status):
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO history (title, url, process_type, quality, final_path, status)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (title, url, process_type, quality, final_path, status))
-                conn.commit()
-        except Exception as e:
-            print(f"Error saving record: {e}")
-
-    def get_history(self, limit=50):
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT id, title, url, process_type, quality, final_path, process_date, status FROM history ORDER BY process_date DESC LIMIT ?', (limit,))
-                return cursor.fetchall()
-        except Exception as e:
-            print(f"Error getting history: {e}")
-            return []
-    
-    def clear_history(self):
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM history')
-                conn.commit()
-                return True
-        except Exception as e:
-            print(f"Error clearing history: {e}")
-            return False
-
-# --- Processing Thread ---
-class ProcessingThread(QThread):
-    """A single thread to handle all backend processing steps."""
-    stage_changed = pyqtSignal(str)
-    progress_update = pyqtSignal(int, str)
-    log_message = pyqtSignal(str)
-    finished = pyqtSignal(bool, str, str) # success, message, final_path
-    video_info_retrieved = pyqtSignal(dict)
-
-    def __init__(self, options):
-        super().__init__()
-        self.options = options
-        self._is_cancelled = False
-        self.current_process = None
-
-    def run(self):
-            try:
-                self.stage_changed.emit("Getting video information...")
-                self.log_message.emit(f"[INFO] Getting info for URL: {self.options['url']}")
-    
-                # 增强网络配置
-                ydl_info_opts = {
-                    'quiet': True,
-                    'no_warnings': True,
-                    'no_check_certificate': True,
-                    'retries': 15,
-                    'fragment_retries': 15,
-                    'socket_timeout': 30,
-                    'force_ipv4': True,
-                }
-                with yt_dlp.YoutubeDL(ydl_info_opts) as ydl:
-                    info_dict = ydl.extract_info(self.options['url'], download=False)
-    
-                self.video_info = {
-                    'title': info_dict.get('title', 'Unknown Title'),
-                    'uploader': info_dict.get('uploader', 'Unknown Uploader'),
-                    'thumbnail': info_dict.get('thumbnail', ''),
-                    'duration': info_dict.get('duration', 0)
-                }
-                self.video_info_retrieved.emit(self.video_info)
-                self.options['title'] = self.video_info['title']
-    
-                if self._is_cancelled: return
-    
-                if self.options['type'] == 'Audio':
-                    self._download_audio()
-                else:
-                    self._process_video()
-    
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
-                self.log_message.emit(f"[ERROR] A critical error occurred: {e}")
-                self.finished.emit(False, str(e), "")
-
-    def _download_audio(self):
-            self.stage_changed.emit("Step 1/1: Downloading Audio (MP3)")
-    
-            output_tmpl = os.path.join(self.options['output_dir'], '%(title)s.%(ext)s')
-            final_path = os.path.join(self.options['output_dir'], f"{self.options['title']}.mp3")
-    
-            # 增强网络配置
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'outtmpl': output_tmpl,
-                'progress_hooks': [self.progress_hook],
-                'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '192',}],
-                'noplaylist': True,
-                'no_check_certificate': True,
-                'retries': 15,
-                'fragment_retries': 15,
-                'socket_timeout': 30,
-                'force_ipv4': True,
-            }
-    
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([self.options['url']])
-    
-            if not self._is_cancelled:
-                self.finished.emit(True, "Audio download completed successfully!", final_path)
-
-    def _process_video(self):
-        base_name = re.sub(r'[\\/*?:"<>|]', "", self.options['title'])
-        downloaded_video_path = os.path.join(self.options['output_dir'], f"{base_name}.mp4")
-        srt_path = os.path.join(self.options['output_dir'], f"{base_name}.srt")
-        translated_srt_path = os.path.join(self.options['output_dir'], f"{base_name}_zh.srt")
-        final_video_path = os.path.join(self.options['output_dir'], f"{base_name}_translated.mp4")
-
-        self._download_video(downloaded_video_path)
-        if self._is_cancelled: return
-
-        self._extract_subtitles(downloaded_video_path, srt_path)
-        if self._is_cancelled: return
-
-        self._translate_subtitles(srt_path, translated_srt_path)
-        if self._is_cancelled: return
-
-        self._synthesize_video(downloaded_video_path, translated_srt_path, final_video_path)
-        if self._is_cancelled: return
-
-        ''' #delete intermediate files
-        try:
-            os.remove(downloaded_video_path)
-            os.remove(srt_path)
-            os.remove(translated_srt_path)
-            self.log_message.emit("[INFO] Cleaned up intermediate files.")
-        except OSError as e:
-            self.log_message.emit(f"[WARN] Could not remove temporary files: {e}")
-        '''
-
-        self.finished.emit(True, "Video processing completed successfully!", final_video_path)
-
-    def _run_subprocess(self, cmd, cwd=None, env=None):
-        self.log_message.emit(f"[CMD] {' '.join(cmd)}")
-        self.current_process = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-            universal_newlines=True, encoding='utf-8', errors='ignore',
-            cwd=cwd,
-            env=env
-        )
-        for line in self.current_process.stdout:
-            if self._is_cancelled:
-                self.current_process.terminate()
-                self.log_message.emit("[INFO] Process terminated by user.")
-                return
-            self.log_message.emit(line.strip())
-
-        self.current_process.wait()
-        if self.current_process.returncode != 0 and not self._is_cancelled:
-            raise RuntimeError(f"A subprocess failed with exit code {self.current_process.returncode}.")
-
-    def _download_video(self, output_path):
-            self.stage_changed.emit("Step 1/4: Downloading Video")
-            quality_map = {"Best": "bv*+ba/b", "1080p": "bv[height<=1080]+ba/b[height<=1080]", "720p": "bv[height<=720]+ba/b[height<=720]","480p": "bv[height<=480]+ba/b[height<=480]"}
-            format_selector = quality_map.get(self.options['quality'], 'bv*+ba/b')
-    
-            # 增强网络配置
-            ydl_opts = {
-                'format': format_selector,
-                'outtmpl': output_path,
-                'progress_hooks': [self.progress_hook],
-                'merge_output_format': 'mp4',
-                'noplaylist': True,
-                'no_check_certificate': True,
-                'retries': 15,
-                'fragment_retries': 15,
-                'socket_timeout': 30,
-                'force_ipv4': True,
-            }
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([self.options['url']])
-
-    def _extract_subtitles(self, video_path, srt_path):
-        self.stage_changed.emit("Step 2/4: Extracting Subtitles (Whisper)")
-        self.progress_update.emit(0, "Initializing Whisper... This may take a while.")
-    
-        # 强制子进程使用 UTF-8 环境
-        proc_env = os.environ.copy()
-        proc_env['PYTHONUTF8'] = '1'
-    
-        absolute_video_path = os.path.abspath(video_path)
-    
-        cmd = ["whisper", absolute_video_path, "--model", self.options['model'], "--language", self.options['language'], "--output_format", "srt"]
-        self._run_subprocess(cmd, cwd=self.options['output_dir'], env=proc_env)
-
-    def _translate_subtitles(self, srt_path, translated_srt_path):
-        self.stage_changed.emit("Step 3/4: Translating Subtitles (DeepSeek API)")
-        self.progress_update.emit(0, "Sending text to translation API...")
-        if not self.options.get('api_key'):
-            raise ValueError("DeepSeek API Key is missing. Please set it in the Settings tab.")
-        translate_srt_file(srt_path, translated_srt_path, self.options['api_key'], self.log_message)
-        self.log_message.emit("[INFO] Subtitles translated successfully.")
-
-    def _synthesize_video(self, video_path, srt_path, output_path):
-        self.stage_changed.emit("Step 4/4: Encoding Final Video (FFmpeg)")
-        absolute_srt_path = os.path.abspath(srt_path).replace('\\', '/')
-        if sys.platform == "win32":
-            absolute_srt_path = absolute_srt_path.replace(':', '\\:', 1)
-        filter_string = f"subtitles='{absolute_srt_path}'"
-        cmd = ["ffmpeg", "-i", video_path, "-vf", filter_string]
-        bitrate = get_video_bitrate(video_path)
-        if bitrate:
-            self.log_message.emit(f"[INFO] Detected original bitrate: {bitrate} bps. Using it for encoding.")
-            cmd.extend(["-c:v", "libx264", "-preset", "medium", "-b:v", bitrate])
-        else:
-            self.log_message.emit("[WARN] Could not detect bitrate. Using CRF=23 for encoding.")
-            cmd.extend(["-c:v", "libx264", "-preset", "medium", "-crf", "23"])
-        cmd.extend(["-c:a", "copy", "-y", output_path])
-        self.log_message.emit(f"[CMD] {' '.join(cmd)}")
-        total_duration = get_video_duration(video_path)
-        self.current_process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, encoding='utf-8', errors='ignore')
-        for line in self.current_process.stdout:
-            if self._is_cancelled:
-                self.current_process.terminate()
-                self.log_message.emit("[INFO] FFmpeg process terminated by user.")
-                return
-            self.log_message.emit(line.strip())
-            if "time=" in line:
-                match = re.search(r"time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})", line)
-                if match and total_duration > 0:
-                    h, m, s, ms = map(int, match.groups())
-                    elapsed_seconds = h * 3600 + m * 60 + s + ms / 100
-                    progress = int((elapsed_seconds / total_duration) * 100)
-                    self.progress_update.emit(progress, f"{progress}% encoded")
-        self.current_process.wait()
-        if self.current_process.returncode != 0 and not self._is_cancelled:
-            raise RuntimeError("FFmpeg failed to synthesize the video.")
-
-    def progress_hook(self, d):
-        if self._is_cancelled:
-            raise yt_dlp.utils.DownloadCancelled
-
-        ansi_escape_pattern = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-
-        if d['status'] == 'downloading':
-            percent_str_raw = d.get('_percent_str', '0.0%')
-            speed_str_raw = d.get('_speed_str', 'N/A')
-            percent_str_clean = ansi_escape_pattern.sub('', percent_str_raw).replace('%', '').strip()
-            speed_str_clean = ansi_escape_pattern.sub('', speed_str_raw).strip()
-            try:
-                percent = float(percent_str_clean)
-                self.progress_update.emit(int(percent), speed_str_clean)
-            except ValueError as e:
-                self.log_message.emit(f"[WARN] Could not parse progress update: {e}")
-        elif d['status'] == 'finished':
-            self.progress_update.emit(100, "Finalizing...")
-
-    def cancel(self):
-        self._is_cancelled = True
-        self.log_message.emit("[ACTION] Cancellation requested by user...")
-        if self.current_process:
-            self.current_process.terminate()
-
-# --- Main Application Window ---
-class VideoProcessorApp(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("YouTube-Setm")
-        self.setGeometry(100, 100, 1000, 800)
-        
-        # Setup icon
-        try:
-            self.setWindowIcon(QIcon('icons/app_icon.png'))
-        except Exception as e:
-            print(f"Could not load icon: {e}")
-
-        self.settings = QSettings("MyCompany", "VideoProcessorApp")
-        self.db_manager = DatabaseManager()
-        self.processing_thread = None
-        self.current_options = {}
-
-        self.init_ui()
-        self.load_settings()
-        self.load_history()
-
-    def init_ui(self):
-        self.setStyleSheet("""
-            QTabBar::tab {
-                background-color: #3B4252;
-                border: 1px solid #4C566A;
-                border-bottom: none;
-                border-top-left-radius: 6px;
-                border-top-right-radius: 6px;
-                padding: 10px 20px;
-                font-weight: bold;
-                min-width: 150px; 
-            }
-            QMainWindow, QWidget {
-                background-color: #2E3440;
-                color: #D8DEE9;
-                font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
-                font-size: 11pt;
-            }
-            QGroupBox {
-                background-color: #3B4252;
-                border: 1px solid #4C566A;
-                border-radius: 8px;
-                margin-top: 1em;
-                padding: 15px;
-                font-weight: bold;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                subcontrol-position: top left;
-                padding: 0 10px;
-                left: 10px;
-                color: #ECEFF4;
-            }
-            QLabel { background-color: transparent; }
-            QLineEdit, QComboBox {
-                background-color: #434C5E;
-                border: 1px solid #4C566A;
-                border-radius: 5px;
-                padding: 8px;
-                min-height: 28px;
-            }
-            QLineEdit:focus, QComboBox:focus { border: 1px solid #88C0D0; }
-            QPushButton {
-                background-color: #5E81AC;
-                color: #ECEFF4;
-                border: none;
-                border-radius: 5px;
-                padding: 10px 20px;
-                font-weight: bold;
-            }
-            QPushButton:hover { background-color: #81A1C1; }
-            QPushButton:pressed { background-color: #4C566A; }
-            QPushButton:disabled { background-color: #3B4252; color: #6c7583; }
-            #cancelButton { background-color: #BF616A; }
-            #cancelButton:hover { background-color: #D08770; }
-            QProgressBar {
-                border: 1px solid #4C566A;
-                border-radius: 5px;
-                text-align: center;
-                color: #ECEFF4;
-                background-color: #3B4252;
-                font-weight: bold;
-            }
-            QProgressBar::chunk { background-color: #A3BE8C; border-radius: 4px; }
-            QTextEdit {
-                background-color: #272B35;
-                border: 1px solid #4C566A;
-                border-radius: 5px;
-                font-family: 'Consolas', 'Courier New', monospace;
-            }
-            QTabWidget::pane { border: none; }
-            QTabBar::tab:selected {
-                background-color: #434C5E;
-                color: #FFFF33;
-                border-bottom: 1px solid #434C5E;
-            }
-            QTabBar::tab:hover { background-color: #4C566A; }
-            #historyItem { border: 1px solid #4C566A; border-radius: 5px; margin: 4px; padding: 8px; background-color: #434C5E;}
-            #historyTitle { font-weight: bold; font-size: 12pt; }
-            #historyUrl { color: #88C0D0; }
-            #historyDetails { color: #B0B8C4; font-size: 9pt; }
-        """)
-
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        main_layout = QVBoxLayout(central_widget)
-
-        self.tabs = QTabWidget()
-        main_layout.addWidget(self.tabs)
-
-        # --- Main Processing Tab ---
-        main_tab = QWidget()
-        main_tab_layout = QVBoxLayout(main_tab)
-        
-        url_group = QGroupBox("1. Input YouTube URL")
-        url_layout = QHBoxLayout(url_group)
-        self.url_input = QLineEdit()
-        self.url_input.setPlaceholderText("Enter YouTube video or playlist link...")
-        self.paste_btn = QPushButton("Paste")
-        self.paste_btn.clicked.connect(lambda: self.url_input.setText(QApplication.clipboard().text()))
-        url_layout.addWidget(self.url_input)
-        url_layout.addWidget(self.paste_btn)
-        main_tab_layout.addWidget(url_group)
-
-        options_group = QGroupBox("2. Select Processing Options")
-        options_layout = QGridLayout(options_group)
-        options_layout.addWidget(QLabel("Process Type:"), 0, 0)
-        self.type_combo = QComboBox()
-        self.type_combo.addItems(["Video (Download, Translate, Synthesize)", "Audio Only (Download as MP3)"])
-        self.type_combo.currentIndexChanged.connect(self.toggle_video_options)
-        options_layout.addWidget(self.type_combo, 0, 1)
-        self.quality_label = QLabel("Video Quality:")
-        options_layout.addWidget(self.quality_label, 1, 0)
-        self.quality_combo = QComboBox()
-        self.quality_combo.addItems(["Best", "1080p", "720p", "480p"])
-        options_layout.addWidget(self.quality_combo, 1, 1)
-        self.lang_label = QLabel("Original Language:")
-        options_layout.addWidget(self.lang_label, 2, 0)
-        self.lang_combo = QComboBox()
-        self.lang_combo.addItems(["en", "ja"])
-        options_layout.addWidget(self.lang_combo, 2, 1)
-        self.model_label = QLabel("Whisper Model:")
-        options_layout.addWidget(self.model_label, 3, 0)
-        self.model_combo = QComboBox()
-        self.model_combo.addItems(["tiny", "small", "medium"])
-        self.model_combo.setCurrentText("small")
-        options_layout.addWidget(self.model_combo, 3, 1)
-        main_tab_layout.addWidget(options_group)
-
-        output_group = QGroupBox("3. Set Output Directory")
-        output_layout = QHBoxLayout(output_group)
-        self.path_display = QLineEdit(os.path.expanduser("~"))
-        self.path_display.setReadOnly(True)
-        browse_btn = QPushButton("Browse...")
-        browse_btn.clicked.connect(self.select_directory)
-        output_layout.addWidget(self.path_display)
-        output_layout.addWidget(browse_btn)
-        main_tab_layout.addWidget(output_group)
-
-        action_layout = QHBoxLayout()
-        self.start_btn = QPushButton("Start Processing")
-        self.start_btn.clicked.connect(self.start_processing)
-        self.cancel_btn = QPushButton("Cancel")
-        self.cancel_btn.setObjectName("cancelButton")
-        self.cancel_btn.clicked.connect(self.cancel_processing)
-        self.cancel_btn.setEnabled(False)
-        action_layout.addStretch()
-        action_layout.addWidget(self.start_btn)
-        action_layout.addWidget(self.cancel_btn)
-        main_tab_layout.addLayout(action_layout)
-        
-        # --- Progress & Log Tab ---
-        progress_tab = QWidget()
-        progress_layout = QVBoxLayout(progress_tab)
-        progress_group = QGroupBox("Live Progress")
-        progress_group_layout = QVBoxLayout(progress_group)
-        self.stage_label = QLabel("Status: Ready")
-        font = self.stage_label.font(); font.setPointSize(14); font.setBold(True)
-        self.stage_label.setFont(font)
-        self.stage_label.setAlignment(Qt.AlignCenter)
-        self.progress_bar = QProgressBar()
-        self.progress_bar.setValue(0)
-        self.progress_bar.setTextVisible(True)
-        self.progress_status_label = QLabel("")
-        self.progress_status_label.setAlignment(Qt.AlignCenter)
-        progress_group_layout.addWidget(self.stage_label)
-        progress_group_layout.addWidget(self.progress_bar)
-        progress_group_layout.addWidget(self.progress_status_label)
-        progress_layout.addWidget(progress_group)
-        log_group = QGroupBox("Detailed Log")
-        log_layout = QVBoxLayout(log_group)
-        self.log_box = QTextEdit()
-        self.log_box.setReadOnly(True)
-        log_layout.addWidget(self.log_box)
-        progress_layout.addWidget(log_group)
-
-        # --- History Tab ---
-        history_tab = QWidget()
-        history_tab_layout = QVBoxLayout(history_tab)
-        
-        history_controls = QHBoxLayout()
-        refresh_btn = QPushButton("Refresh")
-        refresh_btn.clicked.connect(self.load_history)
-        clear_btn = QPushButton("Clear All History")
-        clear_btn.setObjectName("cancelButton")
-        clear_btn.clicked.connect(self.clear_history)
-        history_controls.addWidget(refresh_btn)
-        history_controls.addStretch()
-        history_controls.addWidget(clear_btn)
-        history_tab_layout.addLayout(history_controls)
-        
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("QScrollArea { border: none; }")
-        
-        self.history_widget = QWidget()
-        self.history_layout = QVBoxLayout(self.history_widget)
-        self.history_layout.setAlignment(Qt.AlignTop)
-        
-        scroll_area.setWidget(self.history_widget)
-        history_tab_layout.addWidget(scroll_area)
-        
-        # --- Settings Tab ---
-        settings_tab = QWidget()
-        settings_layout = QVBoxLayout(settings_tab)
-        api_group = QGroupBox("API Keys")
-        api_layout = QGridLayout(api_group)
-        api_layout.addWidget(QLabel("DeepSeek API Key:"), 0, 0)
-        self.api_key_input = QLineEdit()
-        self.api_key_input.setEchoMode(QLineEdit.Password)
-        api_layout.addWidget(self.api_key_input, 0, 1)
-        save_btn = QPushButton("Save Settings")
-        save_btn.clicked.connect(self.save_settings)
-        api_layout.addWidget(save_btn, 1, 1, Qt.AlignRight)
-        settings_layout.addWidget(api_group)
-        settings_layout.addStretch()
-
-        self.tabs.addTab(main_tab, "Process")
-        self.tabs.addTab(progress_tab, "Progress & Log")
-        self.tabs.addTab(history_tab, "History")
-        self.tabs.addTab(settings_tab, "Settings")
-
-    def load_history(self):
-        # Clear current items
-        for i in reversed(range(self.history_layout.count())): 
-            self.history_layout.itemAt(i).widget().setParent(None)
-            
-        history_data = self.db_manager.get_history()
-        
-        if not history_data:
-            empty_label = QLabel("No history yet.")
-            empty_label.setAlignment(Qt.AlignCenter)
-            self.history_layout.addWidget(empty_label)
-            return
-            
-        for record in history_data:
-            item_widget = self.create_history_item_widget(record)
-            self.history_layout.addWidget(item_widget)
-    
-    def create_history_item_widget(self, record):
-        # record: id, title, url, process_type, quality, final_path, process_date, status
-        item_frame = QFrame()
-        item_frame.setObjectName("historyItem")
-        layout = QVBoxLayout(item_frame)
-
-        title = QLabel(record[1])
-        title.setObjectName("historyTitle")
-        title.setWordWrap(True)
-        layout.addWidget(title)
-
-        url = QLabel(f"<a href='{record[2]}' style='color: #88C0D0;'>{record[2]}</a>")
-        url.setOpenExternalLinks(True)
-        url.setWordWrap(True)
-        layout.addWidget(url)
-        
-        details_text = f"Type: {record[3]} | Quality: {record[4]} | Status: {record[7]} | Date: {record[6]}"
-        details = QLabel(details_text)
-        details.setObjectName("historyDetails")
-        layout.addWidget(details)
-
-        path_layout = QHBoxLayout()
-        path_label = QLineEdit(record[5])
-        path_label.setReadOnly(True)
-        open_folder_btn = QPushButton("Open Folder")
-        open_folder_btn.clicked.connect(lambda: open_containing_folder(record[5]))
-        path_layout.addWidget(path_label)
-        path_layout.addWidget(open_folder_btn)
-        layout.addLayout(path_layout)
-        
-        return item_frame
-
-    def clear_history(self):
-        reply = QMessageBox.question(self, "Confirm Clear", 
-                                     "Are you sure you want to delete all history records? This cannot be undone.",
-                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-        if reply == QMessageBox.Yes:
-            if self.db_manager.clear_history():
-                self.load_history()
-                QMessageBox.information(self, "Success", "History has been cleared.")
-            else:
-                QMessageBox.critical(self, "Error", "Failed to clear history.")
-
-    def toggle_video_options(self, index):
-        is_video = (index == 0)
-        for widget in [self.quality_label, self.quality_combo, self.lang_label, self.lang_combo, self.model_label, self.model_combo]:
-            widget.setVisible(is_video)
-
-    def select_directory(self):
-        path = QFileDialog.getExistingDirectory(self, "Select Save Directory", self.path_display.text())
-        if path: self.path_display.setText(path)
-
-    def load_settings(self):
-        self.api_key_input.setText(self.settings.value("deepseek_api_key", ""))
-        self.path_display.setText(self.settings.value("last_output_dir", os.path.expanduser("~")))
-
-    def save_settings(self):
-        self.settings.setValue("deepseek_api_key", self.api_key_input.text())
-        self.settings.setValue("last_output_dir", self.path_display.text())
-        QMessageBox.information(self, "Success", "Settings saved successfully.")
-
-    def log_message(self, message):
-        self.log_box.append(message)
-
-    def start_processing(self):
-        url = self.url_input.text().strip()
-        if not url:
-            QMessageBox.warning(self, "Input Error", "Please provide a valid YouTube URL.")
-            return
-
-        self.current_options = {
-            'url': clean_youtube_url(url),
-            'output_dir': self.path_display.text(),
-            'type': 'Video' if self.type_combo.currentIndex() == 0 else 'Audio',
-            'quality': self.quality_combo.currentText() if self.type_combo.currentIndex() == 0 else 'N/A',
-            'language': self.lang_combo.currentText(),
-            'model': self.model_combo.currentText(),
-            'api_key': self.api_key_input.text()
-        }
-
-        if self.current_options['type'] == 'Video' and not self.current_options['api_key']:
-            QMessageBox.warning(self, "API Key Error", "DeepSeek API Key is required for video processing. Please set it in the Settings tab.")
-            return
-
-        self.tabs.setCurrentIndex(1) # Switch to progress tab
-        self.log_box.clear()
-        self.progress_bar.setValue(0)
-        self.start_btn.setEnabled(False)
-        self.cancel_btn.setEnabled(True)
-        self.log_message("[INFO] Starting new process...")
-        
-        self.processing_thread = ProcessingThread(self.current_options)
-        self.processing_thread.stage_changed.connect(self.stage_label.setText)
-        self.processing_thread.progress_update.connect(lambda p, s: [self.progress_bar.setValue(p), self.progress_status_label.setText(s)])
-        self.processing_thread.log_message.connect(self.log_message)
-        self.processing_thread.finished.connect(self.process_finished)
-        self.processing_thread.start()
-
-    def cancel_processing(self):
-        if self.processing_thread and self.processing_thread.isRunning():
-            self.processing_thread.cancel()
-            self.stage_label.setText("Cancelling...")
-            self.cancel_btn.setEnabled(False)
-
-    def process_finished(self, success, message, final_path):
-        self.start_btn.setEnabled(True)
-        self.cancel_btn.setEnabled(False)
-        
-        status = "Completed" if success else "Failed"
-        
-        # Save record to database
-        self.db_manager.save_record(
-            title=self.current_options.get('title', 'Unknown Title'),
-            url=self.current_options.get('url'),
-            process_type=self.current_options.get('type'),
-            quality=self.current_options.get('quality'),
-            final_path=final_path,
-            status=status
-        )
-        self.load_history() # Refresh history tab
-
-        if success:
-            self.stage_label.setText("Finished!")
-            self.progress_bar.setValue(100)
-            self.log_message(f"[SUCCESS] {message}")
-            QMessageBox.information(self, "Success", f"Process completed!\nOutput file: {final_path}")
-        else:
-            self.stage_label.setText("Error!")
-            self.log_message(f"[ERROR] {message}")
-            QMessageBox.critical(self, "Error", f"An error occurred during processing:\n{message}")
-
-        self.processing_thread = None
-
-    def closeEvent(self, event):
-        #self.save_settings()
-        if self.processing_thread and self.processing_thread.isRunning():
-            self.cancel_processing()
-            self.processing_thread.wait()
-        event.accept()
-
-if __name__ == "__main__":
-    try:
-        import whisper
-    except ImportError as e:
-        QMessageBox.critical(None, "Dependency Error", "The 'openai-whisper' library is missing.\nPlease install it via: pip install git+https://github.com/openai/whisper.git")
-        sys.exit(1)
-
-    app = QApplication(sys.argv)
-    window = VideoProcessorApp()
-    window.show()
+# youtube-setm.py
+
+import asyncio
+import bisect
+import os
+import sys
+import subprocess
+import hashlib
+import json
+import queue
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+import yt_dlp
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from PyQt5.QtCore import (QThread, pyqtSignal, Qt, QSettings, QAbstractListModel,
+                          QModelIndex, QSize, QRect, QUrl, QEvent, QObject,
+                          QRunnable, QThreadPool, QTimer)
+from PyQt5.QtGui import (QFont, QIcon, QPixmap, QImage, QPainter, QColor,
+                         QFontMetrics, QDesktopServices)
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
+                             QLabel, QLineEdit, QPushButton, QProgressBar, QFileDialog,
+                             QMessageBox, QGroupBox, QPlainTextEdit, QComboBox,
+                             QTabWidget, QListView, QStyledItemDelegate)
+
+# --- Helper Functions ---
+
+DEEPSEEK_MODEL = "deepseek-chat"
+
+def _json_dumps(obj):
+    """Serializes to a UTF-8 str, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False)
+
+def _json_loads(data):
+    """Parses JSON from str/bytes, via orjson when it is installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+# Precompiled patterns for the hot paths (progress hooks fire dozens of
+# times per second, so re-parsing these per call adds up)
+_YT_URL_PATTERNS = [
+    re.compile(r'(https?://(?:www\.|m\.|music\.)?youtube\.com/watch\?v=[a-zA-Z0-9_-]+)'),
+    re.compile(r'(https?://youtu\.be/[a-zA-Z0-9_-]+)')
+]
+_ANSI_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+# Bounds concurrent ffmpeg/ffprobe/whisper processes so parallel jobs share
+# the machine instead of thrashing it; each ffmpeg still gets all cores
+FFMPEG_SEM = threading.BoundedSemaphore(max(1, (os.cpu_count() or 2) // 2))
+_UNSAFE_FS_RE = re.compile(r'[\\/*?:"<>|]')
+
+def translation_src_hash(text):
+    """Compact stable key for a source line in the translation cache."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+# Shared session so TCP/TLS connections are reused across concurrent API calls
+_API_SESSION = requests.Session()
+_API_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+
+class _TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a slot frees up."""
+    def __init__(self, rate, per_seconds):
+        self._capacity = float(rate)
+        self._tokens = float(rate)
+        self._per = float(per_seconds)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity,
+                                   self._tokens + (now - self._last) * self._capacity / self._per)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self._per / self._capacity
+            time.sleep(wait)
+
+
+# Pace API calls under the provider's rate limit: sustained throughput beats
+# bursting into 429s, which force whole chunks to be re-sent
+_API_LIMITER = _TokenBucket(60, 60.0)
+
+
+class _LockedSignal:
+    """Wraps a Qt signal so emits from worker threads keep a stable log order."""
+    def __init__(self, signal):
+        self._signal = signal
+        self._lock = threading.Lock()
+
+    def emit(self, message):
+        with self._lock:
+            self._signal.emit(message)
+
+
+def _read_mp4_duration(video_path):
+    """
+    Reads the duration straight from the MP4 'moov/mvhd' atom instead of
+    forking ffprobe. Returns the duration in seconds, or None if the file is
+    not a parseable MP4.
+    """
+    try:
+        with open(video_path, 'rb') as f:
+            def find_atom(name, end):
+                # Scan sibling atoms from the current position up to `end`;
+                # on a match, leave the file positioned just past the header.
+                while f.tell() + 8 <= end:
+                    header = f.read(8)
+                    if len(header) < 8:
+                        return None
+                    size, atom = struct.unpack('>I4s', header)
+                    start = f.tell() - 8
+                    if size == 1:  # 64-bit extended size
+                        size = struct.unpack('>Q', f.read(8))[0]
+                    elif size == 0:  # atom extends to end of enclosing box
+                        size = end - start
+                    if size < 8:
+                        return None
+                    if atom == name:
+                        return start, size
+                    f.seek(start + size)
+                return None
+
+            file_size = os.path.getsize(video_path)
+            moov = find_atom(b'moov', file_size)
+            if not moov:
+                return None
+            mvhd = find_atom(b'mvhd', moov[0] + moov[1])
+            if not mvhd:
+                return None
+
+            version = f.read(1)[0]
+            f.read(3)  # flags
+            if version == 1:
+                f.read(16)  # 64-bit creation/modification times
+                timescale, duration = struct.unpack('>IQ', f.read(12))
+            else:
+                f.read(8)   # 32-bit creation/modification times
+                timescale, duration = struct.unpack('>II', f.read(8))
+            if timescale > 0:
+                return duration / timescale
+    except (OSError, struct.error, IndexError):
+        pass
+    return None
+
+_HW_ENCODER = None
+_HW_ENCODER_CHECKED = False
+
+def detect_hw_encoder():
+    """
+    Returns the best available FFmpeg H.264 hardware encoder name, or None
+    when only libx264 is usable. The ffmpeg -encoders probe runs once per
+    session and the answer is cached.
+    """
+    global _HW_ENCODER, _HW_ENCODER_CHECKED
+    if _HW_ENCODER_CHECKED:
+        return _HW_ENCODER
+    _HW_ENCODER_CHECKED = True
+    try:
+        result = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"],
+                                capture_output=True, text=True, encoding='utf-8', timeout=10)
+        for encoder in ("h264_nvenc", "h264_qsv", "h264_videotoolbox"):
+            if encoder in result.stdout:
+                _HW_ENCODER = encoder
+                break
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return _HW_ENCODER
+
+# Probe results keyed by (path, mtime, size); mtime/size invalidate the
+# entry when a file is re-encoded in place
+_PROBE_CACHE = {}
+
+def probe_video(video_path):
+    """
+    Probes duration and bitrate for a video in one pass: the container header
+    first, then a single ffprobe call for anything the binary parser could
+    not recover. Returns {'duration': float, 'bitrate': Optional[str]}.
+    Results are memoized per file state, so repeat queries are dict hits.
+    """
+    try:
+        stat = os.stat(video_path)
+        cache_key = (video_path, stat.st_mtime, stat.st_size)
+    except OSError:
+        cache_key = None
+    if cache_key is not None and cache_key in _PROBE_CACHE:
+        return dict(_PROBE_CACHE[cache_key])
+
+    duration = _read_mp4_duration(video_path) or 0
+    bitrate = None
+    if duration:
+        try:
+            size_bitrate = int(os.path.getsize(video_path) * 8 / duration)
+            if size_bitrate > 0:
+                bitrate = str(size_bitrate)
+        except OSError:
+            pass
+    else:
+        cmd = [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "format=duration,bit_rate:stream=bit_rate", "-of", "json", video_path
+        ]
+        try:
+            with FFMPEG_SEM:
+                result = subprocess.run(cmd, capture_output=True, text=True, check=True, encoding='utf-8')
+            info = _json_loads(result.stdout)
+            duration = float(info.get("format", {}).get("duration", 0))
+            # Prefer the video stream bitrate, fall back to the format bitrate
+            streams = info.get("streams") or [{}]
+            for candidate in (streams[0].get("bit_rate"), info.get("format", {}).get("bit_rate")):
+                if candidate and str(candidate).isdigit() and int(candidate) > 0:
+                    bitrate = str(candidate)
+                    break
+        except (subprocess.CalledProcessError, FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+            print(f"Error probing video: {e}")
+
+    probe_result = {'duration': duration, 'bitrate': bitrate}
+    if cache_key is not None:
+        _PROBE_CACHE[cache_key] = dict(probe_result)
+    return probe_result
+
+def translate_text_deepseek(text_list, api_key):
+    """
+    Translates a list of texts using the DeepSeek API with a strict JSON format.
+
+    Args:
+        text_list (list): A list of strings to be translated.
+        api_key (str): The DeepSeek API key.
+
+    Returns:
+        list: A list of translated strings.
+
+    Raises:
+        ValueError: If the translation response is invalid, mismatched, or contains an API error.
+    """
+    url = "https://api.deepseek.com/v1/chat/completions"
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+    
+    # A stricter, more explicit prompt demanding a specific JSON structure.
+    system_prompt = """
+    You are an expert subtitle translator. You will receive a JSON array of strings.
+    Translate each string from Japanese or English into natural, fluent Simplified Chinese.
+    Your response MUST be a single JSON object with a single key named "translations", which contains the JSON array of the translated strings.
+    Do not add any extra content, explanations, or markdown.
+
+    Example Input: ["Hello", "How are you?"]
+    Example Output: {"translations": ["你好", "你怎么样？"]}
+    """
+    
+    user_content = _json_dumps(text_list)
+
+    data = {
+        "model": "deepseek-chat",
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content} 
+        ],
+        "temperature": 0.25,
+        "top_p": 0.85,
+        "response_format": {"type": "json_object"}
+    }
+    
+    # Rate-limit and retry transient failures with exponential backoff +
+    # jitter; a stray 429/503 should not abort a whole SRT mid-batch
+    max_attempts = 5
+    response = None
+    for attempt in range(1, max_attempts + 1):
+        _API_LIMITER.acquire()
+        try:
+            response = _API_SESSION.post(url, headers=headers,
+                                         data=_json_dumps(data).encode('utf-8'), timeout=90)
+            response.raise_for_status()
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            retryable = not isinstance(e, requests.HTTPError) or status in (429, 500, 502, 503, 504)
+            if not retryable or attempt == max_attempts:
+                raise ValueError(f"DeepSeek request failed after {attempt} attempt(s): {e}")
+            time.sleep(min(16.0, 2 ** (attempt - 1)) * (0.5 + random.random()))
+
+    try:
+        response_text = _json_loads(response.content)["choices"][0]["message"]["content"]
+        parsed_json = _json_loads(response_text)
+        
+        if not isinstance(parsed_json, dict):
+            raise ValueError(f"API did not return a JSON object. Response: {response_text}")
+
+        if 'error' in parsed_json:
+            raise ValueError(f"API returned an error: {parsed_json.get('error')}")
+
+        translated_list = parsed_json['translations']
+
+        if not isinstance(translated_list, list):
+            raise ValueError("The 'translations' key did not contain a list.")
+
+        if len(translated_list) != len(text_list):
+            raise ValueError(f"Translation mismatch: Expected {len(text_list)}, got {len(translated_list)}.")
+        
+        return translated_list
+        
+    except (KeyError, TypeError):
+        raise ValueError(f"API response did not contain 'translations' key. Response: {response_text}")
+    except Exception as e:
+        raise ValueError(f"An unexpected error occurred: {e}")
+
+def _srt_time_to_seconds(ts):
+    """Converts an SRT 'HH:MM:SS,mmm' timestamp to seconds."""
+    hours, minutes, rest = ts.split(':')
+    seconds, millis = rest.split(',')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000.0
+
+def _seconds_to_srt_time(t):
+    """Converts seconds to an SRT 'HH:MM:SS,mmm' timestamp."""
+    millis = max(0, int(round(t * 1000)))
+    hours, rem = divmod(millis, 3600000)
+    minutes, rem = divmod(rem, 60000)
+    seconds, millis = divmod(rem, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+def iter_srt_blocks(f):
+    """
+    Lazily yields (index, timestamp, text) records from an open SRT file,
+    so memory stays bounded by a single block rather than the transcript.
+    """
+    index = timestamp = None
+    text_lines = []
+    for line in f:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            if index is not None and timestamp is not None:
+                yield (index, timestamp, ' '.join(text_lines).strip())
+            index = timestamp = None
+            text_lines = []
+        elif index is None:
+            if line.strip().isdigit():
+                index = line.strip()
+        elif timestamp is None:
+            timestamp = line.strip()
+        else:
+            text_lines.append(line)
+    if index is not None and timestamp is not None:
+        yield (index, timestamp, ' '.join(text_lines).strip())
+
+def chunk_srt_records(records, max_items=20, max_chars=4000):
+    """
+    Groups SRT records into chunks bounded by item count and total character
+    budget, so each chunk fits comfortably in a single API request.
+    """
+    chunk, chunk_chars = [], 0
+    for record in records:
+        text_len = len(record[2])
+        if chunk and (len(chunk) >= max_items or chunk_chars + text_len > max_chars):
+            yield chunk
+            chunk, chunk_chars = [], 0
+        chunk.append(record)
+        chunk_chars += text_len
+    if chunk:
+        yield chunk
+
+def translate_chunk(batch_originals, api_key, batch_num, start_index, log_signal, cache=None):
+    """
+    Translates one chunk of texts, falling back to single-line requests if the
+    batch response is invalid or mismatched. Lines already present in the
+    translation cache skip the API entirely.
+    """
+    # Partition the chunk into cached hits and lines that still need the API
+    translated = [None] * len(batch_originals)
+    failed = set()
+    if cache is not None:
+        for i, text in enumerate(batch_originals):
+            cached_tgt = cache.get_cached_translation(translation_src_hash(text))
+            if cached_tgt is not None:
+                translated[i] = cached_tgt
+
+    needs_api = [i for i in range(len(batch_originals)) if translated[i] is None]
+    hits = len(batch_originals) - len(needs_api)
+    if hits:
+        log_signal.emit(f"[INFO] Batch {batch_num}: {hits} entries served from translation cache.")
+
+    if needs_api:
+        api_originals = [batch_originals[i] for i in needs_api]
+        try:
+            log_signal.emit(f"[INFO] Translating batch {batch_num} ({len(api_originals)} entries) via JSON batch mode...")
+
+            # --- Primary Method: Attempt batch translation ---
+            batch_translated = translate_text_deepseek(api_originals, api_key)
+            for i, tgt in zip(needs_api, batch_translated):
+                translated[i] = tgt
+            log_signal.emit(f"[INFO] Batch {batch_num} translated successfully.")
+
+        except ValueError as e:
+            # --- Fallback Method: Translate one-by-one if batch fails ---
+            log_signal.emit(f"[WARN] Batch {batch_num} failed: {e}. Falling back to single-line translation for this batch.")
+
+            for i in needs_api:
+                try:
+                    log_signal.emit(f"[INFO] Fallback: Translating line {start_index+i+1}...")
+
+                    # Call the same function, but with a list containing only one item
+                    single_translation_list = translate_text_deepseek([batch_originals[i]], api_key)
+                    translated[i] = single_translation_list[0]
+
+                except Exception as single_e:
+                    log_signal.emit(f"[ERROR] Line {start_index+i+1} failed to translate: {single_e}. Using original text.")
+                    translated[i] = batch_originals[i] # Use original on single failure
+                    failed.add(i)
+
+        # Persist only the lines the API actually translated
+        if cache is not None:
+            new_rows = [(translation_src_hash(batch_originals[i]), batch_originals[i], translated[i], DEEPSEEK_MODEL)
+                        for i in needs_api if i not in failed]
+            cache.put_cached_translations(new_rows)
+
+    return translated
+
+def translate_srt_file(input_srt, output_srt, api_key, log_signal, max_workers=6, cache=None):
+    """
+    Parses an SRT file, groups entries into batches, translates the batches
+    concurrently using a hybrid batch/fallback method, and writes the
+    translated SRT file. Previously translated lines are served from the
+    persistent cache instead of the API.
+    """
+    # Each chunk is pure blocking network I/O, so overlap them across threads.
+    # The emit lock keeps interleaved progress messages readable in the log.
+    locked_log = _LockedSignal(log_signal)
+
+    with open(input_srt, "r", encoding="utf-8") as fin, \
+         open(output_srt, "w", encoding="utf-8") as fout, \
+         ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        # Sliding window of in-flight chunks: FIFO draining preserves block
+        # order while keeping memory bounded by a few chunks, not the file.
+        pending = deque()
+
+        def write_oldest_result():
+            chunk, future = pending.popleft()
+            for record, translated_text in zip(chunk, future.result()):
+                fout.write(f"{record[0]}\n")           # Index
+                fout.write(f"{record[1]}\n")           # Timestamp
+                fout.write(f"{translated_text}\n\n")   # Translated text
+
+        start_index = 0
+        batch_num = 0
+        for chunk in chunk_srt_records(iter_srt_blocks(fin)):
+            batch_num += 1
+            batch_originals = [record[2] for record in chunk]
+            future = executor.submit(translate_chunk, batch_originals, api_key,
+                                     batch_num, start_index, locked_log, cache)
+            pending.append((chunk, future))
+            start_index += len(chunk)
+            if len(pending) >= max_workers * 2:
+                write_oldest_result()
+
+        while pending:
+            write_oldest_result()
+
+def clean_youtube_url(url):
+    """Clean a YouTube URL to its most basic form."""
+    for pattern in _YT_URL_PATTERNS:
+        match = pattern.match(url)
+        if match:
+            return match.group(1)
+    return url
+
+def open_containing_folder(path):
+    """Opens the folder containing the specified file."""
+    if not os.path.exists(path):
+        # If the path points to a file that doesn't exist, use its directory
+        folder = os.path.dirname(path)
+    elif os.path.isdir(path):
+        folder = path
+    else:
+        folder = os.path.dirname(path)
+
+    if not os.path.isdir(folder):
+        print(f"Error: Folder does not exist at {folder}")
+        return
+
+    if sys.platform == 'win32':
+        os.startfile(folder)
+    elif sys.platform == 'darwin':
+        subprocess.Popen(['open', folder])
+    else:
+        subprocess.Popen(['xdg-open', folder])
+
+
+# --- Database Manager ---
+class DatabaseManager:
+    """Manages the SQLite database for processing history."""
+
+    _INSERT_SQL = '''
+        INSERT INTO history (title, url, process_type, quality, final_path, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    _SELECT_ROW_SQL = ('SELECT id, title, url, process_type, quality, final_path, process_date, status '
+                       'FROM history WHERE id = ?')
+
+    def __init__(self, db_path="processing_history.db"):
+        self.db_path = db_path
+        # One long-lived connection shared across threads; every access is
+        # serialized behind the lock, so check_same_thread can be relaxed.
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(
+            'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; '
+            'PRAGMA cache_size=-65536; PRAGMA temp_store=MEMORY;')
+        self._lock = threading.Lock()
+        self.init_database()
+        # History inserts funnel through a queue into one writer thread,
+        # which batches them into a single transaction (one fsync per batch)
+        self._write_q = queue.Queue()
+        self._writer = threading.Thread(target=self._drain_writes, daemon=True)
+        self._writer.start()
+
+    def init_database(self):
+        try:
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS history (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        title TEXT NOT NULL,
+                        url TEXT NOT NULL,
+                        process_type TEXT,
+                        quality TEXT,
+                        final_path TEXT,
+                        process_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        status TEXT
+                    )
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_date ON history(process_date DESC)')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS translation_cache (
+                        src_hash BLOB PRIMARY KEY,
+                        src TEXT,
+                        tgt TEXT,
+                        model TEXT
+                    )
+                ''')
+                self._conn.commit()
+        except Exception as e:
+            print(f"Database initialization error: {e}")
+
+    def get_cached_translation(self, src_hash):
+        try:
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.execute('SELECT tgt FROM translation_cache WHERE src_hash = ?', (src_hash,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            print(f"Error reading translation cache: {e}")
+            return None
+
+    def put_cached_translations(self, rows):
+        """Inserts (src_hash, src, tgt, model) rows in one transaction."""
+        if not rows:
+            return
+        try:
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO translation_cache (src_hash, src, tgt, model)
+                    VALUES (?, ?, ?, ?)
+                ''', rows)
+                self._conn.commit()
+        except Exception as e:
+            print(f"Error writing translation cache: {e}")
+
+    def save_record(self, title, url, process_type, quality, final_path, status, on_committed=None):
+        """
+        Queues a history insert for the writer thread and returns at once.
+        on_committed, if given, is called from the writer thread with the
+        stored row (id and date included) after the transaction lands.
+        """
+        self._write_q.put(((title, url, process_type, quality, final_path, status), on_committed))
+
+    def _drain_writes(self):
+        while True:
+            item = self._write_q.get()
+            batch = [item]
+            try:
+                while len(batch) < 32:
+                    batch.append(self._write_q.get_nowait())
+            except queue.Empty:
+                pass
+            shutdown = None in batch
+            batch = [entry for entry in batch if entry is not None]
+
+            committed = []
+            if batch:
+                try:
+                    with self._lock:
+                        cursor = self._conn.cursor()
+                        cursor.execute('BEGIN IMMEDIATE')
+                        if any(cb is not None for _, cb in batch):
+                            # Row-by-row so lastrowid is known per callback
+                            for row, cb in batch:
+                                cursor.execute(self._INSERT_SQL, row)
+                                if cb is not None:
+                                    cursor.execute(self._SELECT_ROW_SQL, (cursor.lastrowid,))
+                                    committed.append((cursor.fetchone(), cb))
+                        else:
+                            cursor.executemany(self._INSERT_SQL, [row for row, _ in batch])
+                        self._conn.commit()
+                except Exception as e:
+                    print(f"Error saving records: {e}")
+                    committed = []
+
+            for row, cb in committed:
+                try:
+                    cb(row)
+                except Exception as e:
+                    print(f"Error in save_record callback: {e}")
+
+            if shutdown:
+                break
+
+    def fetch_history(self, limit=100, offset=0):
+        """Return one page of history rows, most recent first."""
+        try:
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.execute('SELECT id, title, url, process_type, quality, final_path, process_date, status FROM history ORDER BY process_date DESC, id DESC LIMIT ? OFFSET ?', (limit, offset))
+                return cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting history: {e}")
+            return []
+
+    def clear_history(self):
+        try:
+            with self._lock:
+                cursor = self._conn.cursor()
+                cursor.execute('DELETE FROM history')
+                self._conn.commit()
+                # Reclaim the freed pages; VACUUM must run outside a transaction
+                cursor.execute('VACUUM')
+                return True
+        except Exception as e:
+            print(f"Error clearing history: {e}")
+            return False
+
+    def close(self):
+        try:
+            # Flush queued inserts before closing the connection
+            self._write_q.put(None)
+            self._writer.join(timeout=5)
+            with self._lock:
+                self._conn.close()
+        except Exception as e:
+            print(f"Error closing database: {e}")
+
+# --- Processing Job ---
+class ProcessingSignals(QObject):
+    """Signals for a ProcessingRunnable (QRunnable cannot own signals itself)."""
+    stage_changed = pyqtSignal(str)
+    progress_value = pyqtSignal(int)
+    progress_status = pyqtSignal(str)
+    log_message = pyqtSignal(str)
+    finished = pyqtSignal(bool, str, str) # success, message, final_path
+    video_info_retrieved = pyqtSignal(dict)
+
+class ProcessingRunnable(QRunnable):
+    """A pooled job that handles all backend processing steps."""
+
+    def __init__(self, options):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.options = options
+        self._is_cancelled = False
+        self.current_process = None
+        self.signals = ProcessingSignals()
+        # Bound-signal aliases so the processing code reads the same as before.
+        self.stage_changed = self.signals.stage_changed
+        self.progress_value = self.signals.progress_value
+        self.progress_status = self.signals.progress_status
+        self.log_message = self.signals.log_message
+        self.finished = self.signals.finished
+        self.video_info_retrieved = self.signals.video_info_retrieved
+
+    def run(self):
+            try:
+                self.stage_changed.emit("Getting video information...")
+                self.log_message.emit(f"[INFO] Getting info for URL: {self.options['url']}")
+    
+                # 增强网络配置
+                ydl_info_opts = {
+                    'quiet': True,
+                    'no_warnings': True,
+                    'no_check_certificate': True,
+                    'retries': 15,
+                    'fragment_retries': 15,
+                    'socket_timeout': 30,
+                    'force_ipv4': True,
+                }
+                with yt_dlp.YoutubeDL(ydl_info_opts) as ydl:
+                    info_dict = ydl.extract_info(self.options['url'], download=False)
+    
+                self.video_info = {
+                    'title': info_dict.get('title', 'Unknown Title'),
+                    'uploader': info_dict.get('uploader', 'Unknown Uploader'),
+                    'thumbnail': info_dict.get('thumbnail', ''),
+                    'duration': info_dict.get('duration', 0)
+                }
+                self.video_info_retrieved.emit(self.video_info)
+                self.options['title'] = self.video_info['title']
+    
+                if self._is_cancelled: return
+
+                if self.options['type'] == 'Audio':
+                    self._download_audio(info_dict)
+                else:
+                    self._process_video(info_dict)
+    
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                self.log_message.emit(f"[ERROR] A critical error occurred: {e}")
+                self.finished.emit(False, str(e), "")
+
+    def _download_audio(self, info_dict):
+            self.stage_changed.emit("Step 1/1: Downloading Audio (MP3)")
+    
+            output_tmpl = os.path.join(self.options['output_dir'], '%(title)s.%(ext)s')
+            final_path = os.path.join(self.options['output_dir'], f"{self.options['title']}.mp3")
+    
+            # 增强网络配置
+            ydl_opts = {
+                'format': 'bestaudio/best',
+                'outtmpl': output_tmpl,
+                'progress_hooks': [self.progress_hook],
+                'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '192',}],
+                'noplaylist': True,
+                'no_check_certificate': True,
+                'retries': 15,
+                'fragment_retries': 15,
+                'socket_timeout': 30,
+                'force_ipv4': True,
+            }
+    
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                # Reuse the info extracted at startup instead of letting
+                # download() re-run the whole extraction round trip
+                ydl.process_ie_result(dict(info_dict), download=True)
+
+            if not self._is_cancelled:
+                self.finished.emit(True, "Audio download completed successfully!", final_path)
+
+    def _process_video(self, info_dict):
+        base_name = _UNSAFE_FS_RE.sub("", self.options['title'])
+        downloaded_video_path = os.path.join(self.options['output_dir'], f"{base_name}.mp4")
+        srt_path = os.path.join(self.options['output_dir'], f"{base_name}.srt")
+        translated_srt_path = os.path.join(self.options['output_dir'], f"{base_name}_zh.srt")
+        final_video_path = os.path.join(self.options['output_dir'], f"{base_name}_translated.mp4")
+
+        self._download_video(downloaded_video_path, info_dict)
+        if self._is_cancelled: return
+
+        self._extract_subtitles(downloaded_video_path, srt_path)
+        if self._is_cancelled: return
+
+        self._translate_subtitles(srt_path, translated_srt_path)
+        if self._is_cancelled: return
+
+        self._synthesize_video(downloaded_video_path, translated_srt_path, final_video_path)
+        if self._is_cancelled: return
+
+        ''' #delete intermediate files
+        try:
+            os.remove(downloaded_video_path)
+            os.remove(srt_path)
+            os.remove(translated_srt_path)
+            self.log_message.emit("[INFO] Cleaned up intermediate files.")
+        except OSError as e:
+            self.log_message.emit(f"[WARN] Could not remove temporary files: {e}")
+        '''
+
+        self.finished.emit(True, "Video processing completed successfully!", final_video_path)
+
+    def _emit_buffered(self, log_buf):
+        """Flushes accumulated subprocess output as one signal emission."""
+        if log_buf:
+            self.log_message.emit('\n'.join(log_buf))
+            log_buf.clear()
+
+    def _run_async(self, coro):
+        """Runs a coroutine on a private event loop inside this thread."""
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    async def _stream_subprocess(self, cmd, line_handler=None, cwd=None, env=None, split_streams=False):
+        """
+        Spawns a subprocess and streams its output through the batched log
+        emitter. With split_streams, stdout lines go only to line_handler
+        (e.g. ffmpeg's -progress stream) while stderr feeds the log.
+        Returns the exit code, or None if cancelled.
+        """
+        with FFMPEG_SEM:
+            self.log_message.emit(f"[CMD] {' '.join(cmd)}")
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE if split_streams else asyncio.subprocess.STDOUT,
+                cwd=cwd, env=env)
+            self.current_process = proc
+
+            # Batch log lines so thousands of ffmpeg/whisper lines do not each
+            # cross the thread boundary and reflow the log widget individually
+            log_buf = []
+            last_flush = time.monotonic()
+
+            async def consume(stream, to_log, to_handler):
+                nonlocal last_flush
+                while True:
+                    raw_line = await stream.readline()
+                    if not raw_line:
+                        return
+                    if self._is_cancelled:
+                        proc.terminate()
+                        return
+                    line = raw_line.decode('utf-8', errors='ignore').strip()
+                    if to_log:
+                        log_buf.append(line)
+                        if len(log_buf) >= 64 or time.monotonic() - last_flush > 0.05:
+                            self._emit_buffered(log_buf)
+                            last_flush = time.monotonic()
+                    if to_handler and line_handler is not None:
+                        line_handler(line)
+
+            if split_streams:
+                await asyncio.gather(consume(proc.stdout, False, True),
+                                     consume(proc.stderr, True, False))
+            else:
+                await consume(proc.stdout, True, True)
+            returncode = await proc.wait()
+            self._emit_buffered(log_buf)
+            if self._is_cancelled:
+                self.log_message.emit("[INFO] Process terminated by user.")
+                return None
+            return returncode
+
+    def _run_subprocess(self, cmd, cwd=None, env=None):
+        returncode = self._run_async(self._stream_subprocess(cmd, cwd=cwd, env=env))
+        if returncode is not None and returncode != 0 and not self._is_cancelled:
+            raise RuntimeError(f"A subprocess failed with exit code {returncode}.")
+
+    def _download_video(self, output_path, info_dict):
+            self.stage_changed.emit("Step 1/4: Downloading Video")
+            quality_map = {"Best": "bv*+ba/b", "1080p": "bv[height<=1080]+ba/b[height<=1080]", "720p": "bv[height<=720]+ba/b[height<=720]","480p": "bv[height<=480]+ba/b[height<=480]"}
+            format_selector = quality_map.get(self.options['quality'], 'bv*+ba/b')
+    
+            # 增强网络配置
+            ydl_opts = {
+                'format': format_selector,
+                'outtmpl': output_path,
+                'progress_hooks': [self.progress_hook],
+                'merge_output_format': 'mp4',
+                'noplaylist': True,
+                'no_check_certificate': True,
+                'retries': 15,
+                'fragment_retries': 15,
+                'socket_timeout': 30,
+                'force_ipv4': True,
+            }
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                # Same reuse as the audio path: feed the already-extracted
+                # info through so only the actual download happens here
+                ydl.process_ie_result(dict(info_dict), download=True)
+
+    def _extract_subtitles(self, video_path, srt_path):
+        self.stage_changed.emit("Step 2/4: Extracting Subtitles (Whisper)")
+        self.progress_value.emit(0)
+        self.progress_status.emit("Initializing Whisper... This may take a while.")
+    
+        # 强制子进程使用 UTF-8 环境
+        proc_env = os.environ.copy()
+        proc_env['PYTHONUTF8'] = '1'
+    
+        absolute_video_path = os.path.abspath(video_path)
+    
+        cmd = ["whisper", absolute_video_path, "--model", self.options['model'], "--language", self.options['language'], "--output_format", "srt"]
+        self._run_subprocess(cmd, cwd=self.options['output_dir'], env=proc_env)
+
+    def _translate_subtitles(self, srt_path, translated_srt_path):
+        self.stage_changed.emit("Step 3/4: Translating Subtitles (DeepSeek API)")
+        self.progress_value.emit(0)
+        self.progress_status.emit("Sending text to translation API...")
+        if not self.options.get('api_key'):
+            raise ValueError("DeepSeek API Key is missing. Please set it in the Settings tab.")
+        cache = DatabaseManager()
+        try:
+            translate_srt_file(srt_path, translated_srt_path, self.options['api_key'], self.log_message, cache=cache)
+        finally:
+            cache.close()
+        self.log_message.emit("[INFO] Subtitles translated successfully.")
+
+    def _remux_soft_subtitles(self, video_path, srt_path, output_path):
+        """Muxes the SRT as a mov_text track with stream copy — no re-encode."""
+        self.stage_changed.emit("Step 4/4: Muxing Subtitles (FFmpeg remux)")
+        self.log_message.emit("[INFO] Soft-subtitle mode: remuxing streams without re-encoding.")
+        cmd = ["ffmpeg", "-i", video_path, "-i", srt_path,
+               "-c", "copy", "-c:s", "mov_text", "-metadata:s:s:0", "language=chi",
+               "-y", output_path]
+        returncode = self._run_async(self._stream_subprocess(cmd))
+        if returncode is not None and returncode != 0 and not self._is_cancelled:
+            raise RuntimeError("FFmpeg failed to mux the subtitles.")
+        if not self._is_cancelled:
+            self.progress_value.emit(100)
+            self.progress_status.emit("Remux complete")
+
+    @staticmethod
+    def _subtitle_filter_path(srt_path):
+        """Escapes an SRT path for ffmpeg's subtitles filter."""
+        path = os.path.abspath(srt_path).replace('\\', '/')
+        if sys.platform == "win32":
+            path = path.replace(':', '\\:', 1)
+        return path
+
+    def _keyframe_times(self, video_path):
+        """Keyframe timestamps read from packet metadata — no decode needed."""
+        cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0",
+               "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path]
+        with FFMPEG_SEM:
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True, encoding='utf-8')
+        times = []
+        for line in result.stdout.splitlines():
+            parts = line.split(',')
+            if len(parts) >= 2 and 'K' in parts[1]:
+                try:
+                    times.append(float(parts[0]))
+                except ValueError:
+                    pass
+        times.sort()
+        return times
+
+    @staticmethod
+    def _write_shifted_srt(timed_blocks, seg_start, seg_end, seg_srt_path):
+        """Writes the blocks overlapping a segment, rebased to its start."""
+        with open(seg_srt_path, "w", encoding="utf-8") as f:
+            index = 1
+            for start, end, text in timed_blocks:
+                if end <= seg_start or start >= seg_end:
+                    continue
+                shifted_start = _seconds_to_srt_time(max(start - seg_start, 0.0))
+                shifted_end = _seconds_to_srt_time(min(end, seg_end) - seg_start)
+                f.write(f"{index}\n{shifted_start} --> {shifted_end}\n{text}\n\n")
+                index += 1
+
+    def _synthesize_smartcut(self, video_path, srt_path, output_path, codec_args, rate_args):
+        """
+        Burn-in that re-encodes only the keyframe-aligned segments overlapping
+        subtitles and stream-copies the rest, then concats the pieces.
+        Returns True when it produced the output (or the job was cancelled
+        mid-way), False when the video is unsuitable and the caller should
+        fall back to a full re-encode.
+        """
+        total_duration = probe_video(video_path)['duration']
+        if not total_duration:
+            return False
+
+        # Subtitle display intervals, sorted by start time
+        timed_blocks = []
+        with open(srt_path, "r", encoding="utf-8") as f:
+            for _, timestamp, text in iter_srt_blocks(f):
+                try:
+                    start_ts, end_ts = [t.strip() for t in timestamp.split('-->')]
+                    timed_blocks.append((_srt_time_to_seconds(start_ts), _srt_time_to_seconds(end_ts), text))
+                except ValueError:
+                    return False
+        if not timed_blocks:
+            return False
+        timed_blocks.sort()
+
+        keyframes = self._keyframe_times(video_path)
+        if len(keyframes) < 3:
+            return False
+
+        # Snap each subtitle interval outwards to keyframes and merge overlaps
+        windows = []
+        for start, end, _ in timed_blocks:
+            i = bisect.bisect_right(keyframes, start) - 1
+            k_start = keyframes[i] if i >= 0 else 0.0
+            j = bisect.bisect_left(keyframes, end)
+            k_end = min(keyframes[j] if j < len(keyframes) else total_duration, total_duration)
+            if not windows or k_start > windows[-1][1]:
+                windows.append([k_start, k_end])
+            else:
+                windows[-1][1] = max(windows[-1][1], k_end)
+
+        # Not worth the segmentation overhead if nearly everything needs
+        # encoding anyway
+        encode_time = sum(end - start for start, end in windows)
+        if encode_time / total_duration > 0.6:
+            return False
+
+        # Alternate copy/encode segments covering the full timeline
+        segments = []
+        cursor = 0.0
+        for w_start, w_end in windows:
+            if w_start - cursor > 0.05:
+                segments.append(('copy', cursor, w_start))
+            segments.append(('encode', w_start, w_end))
+            cursor = w_end
+        if total_duration - cursor > 0.05:
+            segments.append(('copy', cursor, total_duration))
+
+        self.log_message.emit(
+            f"[INFO] Smart-cut: re-encoding {encode_time:.0f}s of {total_duration:.0f}s "
+            f"across {len(segments)} segments.")
+
+        base = os.path.splitext(output_path)[0]
+        temp_files = []
+        try:
+            for seg_num, (mode, start, end) in enumerate(segments):
+                if self._is_cancelled:
+                    return True
+                seg_path = f"{base}.smartcut_{seg_num:03d}.mp4"
+                seg_duration = end - start
+                if mode == 'copy':
+                    cmd = ["ffmpeg", "-ss", f"{start:.3f}", "-i", video_path, "-t", f"{seg_duration:.3f}",
+                           "-c", "copy", "-avoid_negative_ts", "make_zero", "-y", seg_path]
+                else:
+                    seg_srt_path = f"{base}.smartcut_{seg_num:03d}.srt"
+                    self._write_shifted_srt(timed_blocks, start, end, seg_srt_path)
+                    temp_files.append(seg_srt_path)
+                    filter_string = f"subtitles='{self._subtitle_filter_path(seg_srt_path)}'"
+                    cmd = (["ffmpeg", "-ss", f"{start:.3f}", "-i", video_path, "-t", f"{seg_duration:.3f}",
+                            "-vf", filter_string] + codec_args + rate_args
+                           + ["-c:a", "copy", "-threads", "0", "-y", seg_path])
+                temp_files.append(seg_path)
+                self.progress_value.emit(int(seg_num / len(segments) * 100))
+                self.progress_status.emit(f"Segment {seg_num + 1}/{len(segments)}")
+                returncode = self._run_async(self._stream_subprocess(cmd))
+                if returncode is None:
+                    return True
+                if returncode != 0:
+                    raise RuntimeError(f"Smart-cut segment {seg_num + 1} failed with exit code {returncode}.")
+
+            concat_list_path = f"{base}.smartcut_concat.txt"
+            temp_files.append(concat_list_path)
+            with open(concat_list_path, "w", encoding="utf-8") as f:
+                for seg_num in range(len(segments)):
+                    f.write(f"file '{os.path.basename(base)}.smartcut_{seg_num:03d}.mp4'\n")
+
+            cmd = ["ffmpeg", "-f", "concat", "-safe", "0", "-i", concat_list_path, "-c", "copy", "-y", output_path]
+            returncode = self._run_async(self._stream_subprocess(cmd))
+            if returncode is None:
+                return True
+            if returncode != 0:
+                raise RuntimeError("Concat of smart-cut segments failed.")
+            self.progress_value.emit(100)
+            self.progress_status.emit("100% encoded")
+            return True
+        finally:
+            for path in temp_files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _synthesize_video(self, video_path, srt_path, output_path):
+        # Soft subtitles need no decode/encode at all: limited by disk
+        # bandwidth instead of the x264 encoder
+        if not self.options.get('burn_in'):
+            self._remux_soft_subtitles(video_path, srt_path, output_path)
+            return
+
+        self.stage_changed.emit("Step 4/4: Encoding Final Video (FFmpeg)")
+        probe = probe_video(video_path)
+        bitrate = probe['bitrate']
+
+        # Prefer a fixed-function hardware encoder when ffmpeg exposes one;
+        # encoding is the dominant wall-clock cost of the whole pipeline
+        encoder = detect_hw_encoder()
+        if encoder == "h264_nvenc":
+            codec_args = ["-c:v", "h264_nvenc", "-preset", "p4", "-tune", "hq"]
+        elif encoder == "h264_qsv":
+            codec_args = ["-c:v", "h264_qsv", "-preset", "medium"]
+        elif encoder == "h264_videotoolbox":
+            codec_args = ["-c:v", "h264_videotoolbox"]
+        else:
+            codec_args = ["-c:v", "libx264", "-preset", "medium"]
+        if encoder:
+            self.log_message.emit(f"[INFO] Using hardware encoder: {encoder}.")
+
+        if bitrate:
+            self.log_message.emit(f"[INFO] Detected original bitrate: {bitrate} bps. Using it for encoding.")
+            rate_args = ["-b:v", bitrate]
+        elif encoder:
+            # Hardware encoders do not share libx264's CRF scale; let the
+            # encoder's default rate control pick the quality target
+            self.log_message.emit("[WARN] Could not detect bitrate. Using encoder default rate control.")
+            rate_args = []
+        else:
+            self.log_message.emit("[WARN] Could not detect bitrate. Using CRF=23 for encoding.")
+            rate_args = ["-crf", "23"]
+
+        # Try the segmented burn first: it skips re-encoding every stretch
+        # with no captions on screen
+        try:
+            if self._synthesize_smartcut(video_path, srt_path, output_path, codec_args, rate_args):
+                return
+            self.log_message.emit("[INFO] Smart-cut not applicable; re-encoding the full video.")
+        except Exception as e:
+            self.log_message.emit(f"[WARN] Smart-cut failed: {e}. Falling back to full re-encode.")
+
+        filter_string = f"subtitles='{self._subtitle_filter_path(srt_path)}'"
+        cmd = (["ffmpeg", "-progress", "pipe:1", "-nostats", "-i", video_path, "-vf", filter_string]
+               + codec_args + rate_args + ["-c:a", "copy", "-threads", "0", "-y", output_path])
+        total_duration = probe['duration']
+
+        # Structured key=value progress on stdout; no regex over stderr noise
+        def handle_progress(line):
+            if line.startswith("out_time_ms=") and total_duration > 0:
+                try:
+                    elapsed_seconds = int(line.split('=', 1)[1]) / 1_000_000
+                except ValueError:
+                    return
+                progress = int((elapsed_seconds / total_duration) * 100)
+                self.progress_value.emit(progress)
+                self.progress_status.emit(f"{progress}% encoded")
+
+        returncode = self._run_async(self._stream_subprocess(cmd, line_handler=handle_progress,
+                                                             split_streams=True))
+        if returncode is not None and returncode != 0 and not self._is_cancelled:
+            raise RuntimeError("FFmpeg failed to synthesize the video.")
+
+    def progress_hook(self, d):
+        if self._is_cancelled:
+            raise yt_dlp.utils.DownloadCancelled
+
+        if d['status'] == 'downloading':
+            percent_str_raw = d.get('_percent_str', '0.0%')
+            speed_str_raw = d.get('_speed_str', 'N/A')
+            percent_str_clean = _ANSI_RE.sub('', percent_str_raw).replace('%', '').strip()
+            speed_str_clean = _ANSI_RE.sub('', speed_str_raw).strip()
+            try:
+                percent = float(percent_str_clean)
+                self.progress_value.emit(int(percent))
+                self.progress_status.emit(speed_str_clean)
+            except ValueError as e:
+                self.log_message.emit(f"[WARN] Could not parse progress update: {e}")
+        elif d['status'] == 'finished':
+            self.progress_value.emit(100)
+            self.progress_status.emit("Finalizing...")
+
+    def cancel(self):
+        self._is_cancelled = True
+        self.log_message.emit("[ACTION] Cancellation requested by user...")
+        if self.current_process:
+            self.current_process.terminate()
+
+# --- History Model/View ---
+class HistoryModel(QAbstractListModel):
+    """
+    List model over history rows, paged lazily from DatabaseManager: only
+    PAGE_SIZE rows are pulled per query, and the view asks for the next page
+    via canFetchMore/fetchMore as the user scrolls.
+    """
+    TitleRole = Qt.UserRole + 1
+    UrlRole = Qt.UserRole + 2
+    DetailsRole = Qt.UserRole + 3
+    PathRole = Qt.UserRole + 4
+
+    PAGE_SIZE = 100
+
+    def __init__(self, fetch_page, parent=None):
+        super().__init__(parent)
+        self._fetch_page = fetch_page  # callable(limit, offset) -> rows
+        self._rows = []
+        self._exhausted = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self._rows)):
+            return None
+        # row: id, title, url, process_type, quality, final_path, process_date, status
+        record = self._rows[index.row()]
+        if role == self.TitleRole:
+            return record[1]
+        if role == self.UrlRole:
+            return record[2]
+        if role == self.DetailsRole:
+            return f"Type: {record[3]} | Quality: {record[4]} | Status: {record[7]} | Date: {record[6]}"
+        if role == self.PathRole:
+            return record[5]
+        return None
+
+    def refresh(self):
+        self.beginResetModel()
+        self._rows = list(self._fetch_page(self.PAGE_SIZE, 0))
+        self._exhausted = len(self._rows) < self.PAGE_SIZE
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        page = self._fetch_page(self.PAGE_SIZE, len(self._rows))
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self._rows),
+                                 len(self._rows) + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+        if len(page) < self.PAGE_SIZE:
+            self._exhausted = True
+
+    def prepend(self, record):
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._rows.insert(0, record)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = True
+        self.endResetModel()
+
+
+class HistoryDelegate(QStyledItemDelegate):
+    """
+    Paints one history record as a card, so the view never has to build a
+    widget tree per row. The URL line opens the video in a browser; the path
+    line opens the containing folder.
+    """
+    MARGIN = 4
+    PADDING = 8
+    LINE_SPACING = 4
+
+    def _fonts(self, option):
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        title_font.setPointSize(12)
+        details_font = QFont(option.font)
+        details_font.setPointSize(9)
+        return title_font, QFont(option.font), details_font
+
+    def _line_rects(self, option):
+        """Card rect plus one (font, rect) per line: title, url, details, path.
+        Shared by paint and editorEvent so click targets match the drawing."""
+        title_font, base_font, details_font = self._fonts(option)
+        card = option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        inner = card.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        lines = []
+        y = inner.top()
+        for font in (title_font, base_font, details_font, base_font):
+            line_height = QFontMetrics(font).height()
+            lines.append((font, QRect(inner.left(), y, inner.width(), line_height)))
+            y += line_height + self.LINE_SPACING
+        return card, lines
+
+    def sizeHint(self, option, index):
+        _, lines = self._line_rects(option)
+        height = lines[-1][1].bottom() - option.rect.top() + self.PADDING + self.MARGIN
+        return QSize(option.rect.width(), height)
+
+    def paint(self, painter, option, index):
+        title = index.data(HistoryModel.TitleRole)
+        if title is None:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        card, lines = self._line_rects(option)
+        painter.setPen(QColor('#4C566A'))
+        painter.setBrush(QColor('#434C5E'))
+        painter.drawRoundedRect(card, 5, 5)
+
+        texts_colors = [
+            (title, '#ECEFF4'),
+            (index.data(HistoryModel.UrlRole), '#88C0D0'),
+            (index.data(HistoryModel.DetailsRole), '#B0B8C4'),
+            (index.data(HistoryModel.PathRole) or '', '#D8DEE9'),
+        ]
+        for (font, rect), (text, color) in zip(lines, texts_colors):
+            painter.setFont(font)
+            painter.setPen(QColor(color))
+            elided = QFontMetrics(font).elidedText(text, Qt.ElideMiddle, rect.width())
+            painter.drawText(rect, Qt.AlignLeft | Qt.AlignVCenter, elided)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseMove:
+            # Requires mouse tracking on the view; shows a hand cursor over
+            # the clickable url/path lines
+            _, lines = self._line_rects(option)
+            over_link = ((index.data(HistoryModel.UrlRole) and lines[1][1].contains(event.pos())) or
+                         (index.data(HistoryModel.PathRole) and lines[3][1].contains(event.pos())))
+            view = option.widget
+            if view is not None:
+                view.viewport().setCursor(
+                    Qt.PointingHandCursor if over_link else Qt.ArrowCursor)
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            _, lines = self._line_rects(option)
+            url = index.data(HistoryModel.UrlRole)
+            if url and lines[1][1].contains(event.pos()):
+                QDesktopServices.openUrl(QUrl(url))
+                return True
+            path = index.data(HistoryModel.PathRole)
+            if path and lines[3][1].contains(event.pos()):
+                open_containing_folder(path)
+                return True
+        elif event.type() == QEvent.MouseButtonRelease and event.button() == Qt.RightButton:
+            # Right-click on the (elided) path line copies the full path
+            path = index.data(HistoryModel.PathRole)
+            _, lines = self._line_rects(option)
+            if path and lines[3][1].contains(event.pos()):
+                QApplication.clipboard().setText(path)
+                return True
+        return super().editorEvent(event, model, option, index)
+
+
+# --- Main Application Window ---
+class VideoProcessorApp(QMainWindow):
+    # Bridges the DB writer thread back to the UI thread: emitted with the
+    # committed history row once its transaction has actually landed
+    record_committed = pyqtSignal(tuple)
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("YouTube-Setm")
+        self.setGeometry(100, 100, 1000, 800)
+        
+        # Setup icon
+        try:
+            self.setWindowIcon(QIcon('icons/app_icon.png'))
+        except Exception as e:
+            print(f"Could not load icon: {e}")
+
+        self.settings = QSettings("MyCompany", "VideoProcessorApp")
+        # Batch settings writes: skip the atomic temp-file dance and debounce
+        # the flush so repeated saves cost one disk sync
+        self.settings.setAtomicSyncRequired(False)
+        self._settings_timer = QTimer(self)
+        self._settings_timer.setSingleShot(True)
+        self._settings_timer.setInterval(500)
+        self._settings_timer.timeout.connect(self._flush_settings)
+        self.db_manager = DatabaseManager()
+        self.record_committed.connect(self._on_record_committed)
+        self.processing_job = None
+        # Leave a couple of cores free for ffmpeg/whisper child processes.
+        QThreadPool.globalInstance().setMaxThreadCount(
+            max(2, QThread.idealThreadCount() - 2))
+        self.current_options = {}
+        # Non-blocking fetches (thumbnails) ride the Qt event loop
+        self.network_manager = QNetworkAccessManager(self)
+        self._log_buf = []
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(50)
+        self._log_timer.timeout.connect(self._flush_log)
+
+        self.init_ui()
+        self.load_settings()
+        self.load_history()
+
+    def init_ui(self):
+        self.setStyleSheet("""
+            QTabBar::tab {
+                background-color: #3B4252;
+                border: 1px solid #4C566A;
+                border-bottom: none;
+                border-top-left-radius: 6px;
+                border-top-right-radius: 6px;
+                padding: 10px 20px;
+                font-weight: bold;
+                min-width: 150px; 
+            }
+            QMainWindow, QWidget {
+                background-color: #2E3440;
+                color: #D8DEE9;
+                font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
+                font-size: 11pt;
+            }
+            QGroupBox {
+                background-color: #3B4252;
+                border: 1px solid #4C566A;
+                border-radius: 8px;
+                margin-top: 1em;
+                padding: 15px;
+                font-weight: bold;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                subcontrol-position: top left;
+                padding: 0 10px;
+                left: 10px;
+                color: #ECEFF4;
+            }
+            QLabel { background-color: transparent; }
+            QLineEdit, QComboBox {
+                background-color: #434C5E;
+                border: 1px solid #4C566A;
+                border-radius: 5px;
+                padding: 8px;
+                min-height: 28px;
+            }
+            QLineEdit:focus, QComboBox:focus { border: 1px solid #88C0D0; }
+            QPushButton {
+                background-color: #5E81AC;
+                color: #ECEFF4;
+                border: none;
+                border-radius: 5px;
+                padding: 10px 20px;
+                font-weight: bold;
+            }
+            QPushButton:hover { background-color: #81A1C1; }
+            QPushButton:pressed { background-color: #4C566A; }
+            QPushButton:disabled { background-color: #3B4252; color: #6c7583; }
+            #cancelButton { background-color: #BF616A; }
+            #cancelButton:hover { background-color: #D08770; }
+            QProgressBar {
+                border: 1px solid #4C566A;
+                border-radius: 5px;
+                text-align: center;
+                color: #ECEFF4;
+                background-color: #3B4252;
+                font-weight: bold;
+            }
+            QProgressBar::chunk { background-color: #A3BE8C; border-radius: 4px; }
+            QPlainTextEdit {
+                background-color: #272B35;
+                border: 1px solid #4C566A;
+                border-radius: 5px;
+                font-family: 'Consolas', 'Courier New', monospace;
+            }
+            QTabWidget::pane { border: none; }
+            QTabBar::tab:selected {
+                background-color: #434C5E;
+                color: #FFFF33;
+                border-bottom: 1px solid #434C5E;
+            }
+            QTabBar::tab:hover { background-color: #4C566A; }
+        """)
+
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QVBoxLayout(central_widget)
+
+        self.tabs = QTabWidget()
+        main_layout.addWidget(self.tabs)
+
+        # --- Main Processing Tab ---
+        main_tab = QWidget()
+        main_tab_layout = QVBoxLayout(main_tab)
+        
+        url_group = QGroupBox("1. Input YouTube URL")
+        url_layout = QHBoxLayout(url_group)
+        self.url_input = QLineEdit()
+        self.url_input.setPlaceholderText("Enter YouTube video or playlist link...")
+        self.paste_btn = QPushButton("Paste")
+        self.paste_btn.clicked.connect(self.paste_url)
+        url_layout.addWidget(self.url_input)
+        url_layout.addWidget(self.paste_btn)
+        main_tab_layout.addWidget(url_group)
+
+        options_group = QGroupBox("2. Select Processing Options")
+        options_layout = QGridLayout(options_group)
+        options_layout.addWidget(QLabel("Process Type:"), 0, 0)
+        self.type_combo = QComboBox()
+        self.type_combo.addItems(["Video (Download, Translate, Synthesize)", "Audio Only (Download as MP3)"])
+        self.type_combo.currentIndexChanged.connect(self.toggle_video_options)
+        options_layout.addWidget(self.type_combo, 0, 1)
+        # Video-only rows live in one container so toggling modes is a single
+        # setVisible call (one layout invalidation instead of one per widget)
+        self.video_only_group = QWidget()
+        video_only_layout = QGridLayout(self.video_only_group)
+        video_only_layout.setContentsMargins(0, 0, 0, 0)
+        self.quality_label = QLabel("Video Quality:")
+        video_only_layout.addWidget(self.quality_label, 0, 0)
+        self.quality_combo = QComboBox()
+        self.quality_combo.addItems(["Best", "1080p", "720p", "480p"])
+        video_only_layout.addWidget(self.quality_combo, 0, 1)
+        self.lang_label = QLabel("Original Language:")
+        video_only_layout.addWidget(self.lang_label, 1, 0)
+        self.lang_combo = QComboBox()
+        self.lang_combo.addItems(["en", "ja"])
+        video_only_layout.addWidget(self.lang_combo, 1, 1)
+        self.model_label = QLabel("Whisper Model:")
+        video_only_layout.addWidget(self.model_label, 2, 0)
+        self.model_combo = QComboBox()
+        self.model_combo.addItems(["tiny", "small", "medium"])
+        self.model_combo.setCurrentText("small")
+        video_only_layout.addWidget(self.model_combo, 2, 1)
+        self.subtitle_label = QLabel("Subtitle Mode:")
+        video_only_layout.addWidget(self.subtitle_label, 3, 0)
+        self.subtitle_combo = QComboBox()
+        self.subtitle_combo.addItems(["Soft subtitles (fast remux)", "Burn-in (re-encode)"])
+        video_only_layout.addWidget(self.subtitle_combo, 3, 1)
+        options_layout.addWidget(self.video_only_group, 1, 0, 1, 2)
+        main_tab_layout.addWidget(options_group)
+
+        output_group = QGroupBox("3. Set Output Directory")
+        output_layout = QHBoxLayout(output_group)
+        self.path_display = QLineEdit(os.path.expanduser("~"))
+        self.path_display.setReadOnly(True)
+        browse_btn = QPushButton("Browse...")
+        browse_btn.clicked.connect(self.select_directory)
+        output_layout.addWidget(self.path_display)
+        output_layout.addWidget(browse_btn)
+        main_tab_layout.addWidget(output_group)
+
+        action_layout = QHBoxLayout()
+        self.start_btn = QPushButton("Start Processing")
+        self.start_btn.clicked.connect(self.start_processing)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setObjectName("cancelButton")
+        self.cancel_btn.clicked.connect(self.cancel_processing)
+        self.cancel_btn.setEnabled(False)
+        action_layout.addStretch()
+        action_layout.addWidget(self.start_btn)
+        action_layout.addWidget(self.cancel_btn)
+        main_tab_layout.addLayout(action_layout)
+        
+        # --- Progress & Log Tab ---
+        progress_tab = QWidget()
+        progress_layout = QVBoxLayout(progress_tab)
+        progress_group = QGroupBox("Live Progress")
+        progress_group_layout = QVBoxLayout(progress_group)
+        self.thumbnail_label = QLabel()
+        self.thumbnail_label.setAlignment(Qt.AlignCenter)
+        self.thumbnail_label.setVisible(False)
+        self.stage_label = QLabel("Status: Ready")
+        font = self.stage_label.font(); font.setPointSize(14); font.setBold(True)
+        self.stage_label.setFont(font)
+        self.stage_label.setAlignment(Qt.AlignCenter)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        self.progress_bar.setTextVisible(True)
+        self.progress_status_label = QLabel("")
+        self.progress_status_label.setAlignment(Qt.AlignCenter)
+        progress_group_layout.addWidget(self.thumbnail_label)
+        progress_group_layout.addWidget(self.stage_label)
+        progress_group_layout.addWidget(self.progress_bar)
+        progress_group_layout.addWidget(self.progress_status_label)
+        progress_layout.addWidget(progress_group)
+        log_group = QGroupBox("Detailed Log")
+        log_layout = QVBoxLayout(log_group)
+        self.log_box = QPlainTextEdit()
+        self.log_box.setReadOnly(True)
+        self.log_box.setMaximumBlockCount(5000)
+        log_layout.addWidget(self.log_box)
+        progress_layout.addWidget(log_group)
+
+        # --- History Tab ---
+        history_tab = QWidget()
+        history_tab_layout = QVBoxLayout(history_tab)
+        
+        history_controls = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.load_history)
+        clear_btn = QPushButton("Clear All History")
+        clear_btn.setObjectName("cancelButton")
+        clear_btn.clicked.connect(self.clear_history)
+        history_controls.addWidget(refresh_btn)
+        history_controls.addStretch()
+        history_controls.addWidget(clear_btn)
+        history_tab_layout.addLayout(history_controls)
+        
+        self.history_empty_label = QLabel("No history yet.")
+        self.history_empty_label.setAlignment(Qt.AlignCenter)
+        history_tab_layout.addWidget(self.history_empty_label)
+
+        # Model/view so only the visible rows are ever painted
+        self.history_model = HistoryModel(self.db_manager.fetch_history)
+        self.history_view = QListView()
+        self.history_view.setModel(self.history_model)
+        self.history_view.setItemDelegate(HistoryDelegate(self.history_view))
+        self.history_view.setSelectionMode(QListView.NoSelection)
+        self.history_view.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.history_view.setMouseTracking(True)
+        self.history_view.setStyleSheet("QListView { border: none; background-color: #2E3440; }")
+        history_tab_layout.addWidget(self.history_view)
+        
+        # --- Settings Tab ---
+        settings_tab = QWidget()
+        settings_layout = QVBoxLayout(settings_tab)
+        api_group = QGroupBox("API Keys")
+        api_layout = QGridLayout(api_group)
+        api_layout.addWidget(QLabel("DeepSeek API Key:"), 0, 0)
+        self.api_key_input = QLineEdit()
+        self.api_key_input.setEchoMode(QLineEdit.Password)
+        api_layout.addWidget(self.api_key_input, 0, 1)
+        save_btn = QPushButton("Save Settings")
+        save_btn.clicked.connect(self.save_settings)
+        api_layout.addWidget(save_btn, 1, 1, Qt.AlignRight)
+        settings_layout.addWidget(api_group)
+        settings_layout.addStretch()
+
+        self.tabs.addTab(main_tab, "Process")
+        self.tabs.addTab(progress_tab, "Progress & Log")
+        self.tabs.addTab(history_tab, "History")
+        self.tabs.addTab(settings_tab, "Settings")
+
+    def load_history(self):
+        self.history_model.refresh()
+        has_rows = self.history_model.rowCount() > 0
+        self.history_empty_label.setVisible(not has_rows)
+        self.history_view.setVisible(has_rows)
+
+    def _on_record_committed(self, record):
+        self.history_model.prepend(record)
+        self.history_empty_label.setVisible(False)
+        self.history_view.setVisible(True)
+
+    def clear_history(self):
+        reply = QMessageBox.question(self, "Confirm Clear",
+                                     "Are you sure you want to delete all history records? This cannot be undone.",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            if self.db_manager.clear_history():
+                # The table is empty now; clear the model directly instead of
+                # re-querying, and let the empty list speak for itself
+                self.history_model.clear()
+                self.history_empty_label.setVisible(True)
+                self.history_view.setVisible(False)
+            else:
+                QMessageBox.critical(self, "Error", "Failed to clear history.")
+
+    def toggle_video_options(self, index):
+        self.video_only_group.setVisible(index == 0)
+
+    def paste_url(self):
+        self.url_input.setText(QApplication.clipboard().text())
+
+    def select_directory(self):
+        path = QFileDialog.getExistingDirectory(self, "Select Save Directory", self.path_display.text())
+        if path: self.path_display.setText(path)
+
+    def load_settings(self):
+        self.api_key_input.setText(self.settings.value("deepseek_api_key", ""))
+        self.path_display.setText(self.settings.value("last_output_dir", os.path.expanduser("~")))
+
+    def save_settings(self):
+        self._settings_timer.start()
+        QMessageBox.information(self, "Success", "Settings saved successfully.")
+
+    def _flush_settings(self):
+        self.settings.setValue("deepseek_api_key", self.api_key_input.text())
+        self.settings.setValue("last_output_dir", self.path_display.text())
+        self.settings.sync()
+
+    def log_message(self, message):
+        # Buffer and flush on a short timer so bursts of log lines cost one
+        # document update instead of one relayout per line
+        self._log_buf.append(message)
+        if not self._log_timer.isActive():
+            self._log_timer.start()
+
+    def _flush_log(self):
+        if self._log_buf:
+            self.log_box.appendPlainText("\n".join(self._log_buf))
+            self._log_buf.clear()
+
+    def show_video_info(self, info):
+        """Kicks off an async thumbnail fetch; the UI never blocks on it."""
+        thumbnail_url = info.get('thumbnail')
+        if not thumbnail_url:
+            return
+        reply = self.network_manager.get(QNetworkRequest(QUrl(thumbnail_url)))
+        reply.finished.connect(lambda r=reply: self._thumbnail_fetched(r))
+
+    def _thumbnail_fetched(self, reply):
+        image = QImage.fromData(reply.readAll())
+        reply.deleteLater()
+        if image.isNull():
+            return
+        pixmap = QPixmap.fromImage(image).scaledToHeight(120, Qt.SmoothTransformation)
+        self.thumbnail_label.setPixmap(pixmap)
+        self.thumbnail_label.setVisible(True)
+
+    def start_processing(self):
+        url = self.url_input.text().strip()
+        if not url:
+            QMessageBox.warning(self, "Input Error", "Please provide a valid YouTube URL.")
+            return
+
+        self.current_options = {
+            'url': clean_youtube_url(url),
+            'output_dir': self.path_display.text(),
+            'type': 'Video' if self.type_combo.currentIndex() == 0 else 'Audio',
+            'quality': self.quality_combo.currentText() if self.type_combo.currentIndex() == 0 else 'N/A',
+            'language': self.lang_combo.currentText(),
+            'model': self.model_combo.currentText(),
+            'burn_in': self.subtitle_combo.currentIndex() == 1,
+            'api_key': self.api_key_input.text()
+        }
+
+        if self.current_options['type'] == 'Video' and not self.current_options['api_key']:
+            QMessageBox.warning(self, "API Key Error", "DeepSeek API Key is required for video processing. Please set it in the Settings tab.")
+            return
+
+        self.tabs.setCurrentIndex(1) # Switch to progress tab
+        self._log_buf.clear()
+        self.log_box.clear()
+        self.thumbnail_label.clear()
+        self.thumbnail_label.setVisible(False)
+        self.progress_bar.setValue(0)
+        self.start_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.log_message("[INFO] Starting new process...")
+        
+        self.processing_job = ProcessingRunnable(self.current_options)
+        signals = self.processing_job.signals
+        signals.stage_changed.connect(self.stage_label.setText)
+        signals.progress_value.connect(self.progress_bar.setValue)
+        signals.progress_status.connect(self.progress_status_label.setText)
+        signals.log_message.connect(self.log_message)
+        signals.video_info_retrieved.connect(self.show_video_info)
+        signals.finished.connect(self.process_finished)
+        QThreadPool.globalInstance().start(self.processing_job)
+
+    def cancel_processing(self):
+        if self.processing_job:
+            self.processing_job.cancel()
+            self.stage_label.setText("Cancelling...")
+            self.cancel_btn.setEnabled(False)
+
+    def process_finished(self, success, message, final_path):
+        self.start_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        
+        status = "Completed" if success else "Failed"
+        
+        # Queue the insert; the writer thread commits it and hands the stored
+        # row back through record_committed for the History tab
+        title = self.current_options.get('title', 'Unknown Title')
+        self.db_manager.save_record(
+            title=title,
+            url=self.current_options.get('url'),
+            process_type=self.current_options.get('type'),
+            quality=self.current_options.get('quality'),
+            final_path=final_path,
+            status=status,
+            on_committed=self.record_committed.emit
+        )
+
+        if success:
+            self.stage_label.setText("Finished!")
+            self.progress_bar.setValue(100)
+            self.log_message(f"[SUCCESS] {message}")
+            QMessageBox.information(self, "Success", f"Process completed!\nOutput file: {final_path}")
+        else:
+            self.stage_label.setText("Error!")
+            self.log_message(f"[ERROR] {message}")
+            QMessageBox.critical(self, "Error", f"An error occurred during processing:\n{message}")
+
+        self.processing_job = None
+
+    def closeEvent(self, event):
+        if self._settings_timer.isActive():
+            self._settings_timer.stop()
+            self._flush_settings()
+        if self.processing_job:
+            self.cancel_processing()
+        QThreadPool.globalInstance().waitForDone(5000)
+        self.db_manager.close()
+        event.accept()
+
+if __name__ == "__main__":
+    try:
+        import whisper
+    except ImportError as e:
+        QMessageBox.critical(None, "Dependency Error", "The 'openai-whisper' library is missing.\nPlease install it via: pip install git+https://github.com/openai/whisper.git")
+        sys.exit(1)
+
+    app = QApplication(sys.argv)
+    window = VideoProcessorApp()
+    window.show()
     sys.exit(app.exec_())
\ No newline at end of file